@@ -6,4 +6,5 @@ class ImageInfo(BaseModel):
     mime_type: str
     file_size: int
     original_filename: str
+    created_at: int  # nanoseconds since the epoch, set at upload time
     tags: list[str]
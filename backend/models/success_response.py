@@ -1,7 +1,10 @@
 from pydantic import BaseModel
-from typing import Literal
+from typing import Any, Literal
 
 class SuccessResponse(BaseModel):
     """Success API Response"""
     success: Literal[True] = True
-    data: dict | list | str | int | None = None
+    # Any, so handlers can hand over models (or lists of them) as-is and
+    # Pydantic serializes the whole envelope in a single pass instead of
+    # model_dump() here and a second walk at the response boundary.
+    data: Any = None
@@ -1,264 +1,531 @@
-from db import get_db_connection
+import sys
+from functools import lru_cache
+
+from collections.abc import Iterable
+
+from db import TAG_INDEXES, borrow_connection, run_write
 from models import ImageInfo
 
+# SQL is kept in module-level constants so every execution presents the
+# exact same text to sqlite3's per-connection statement cache.
+# OR IGNORE keeps a concurrent duplicate upload (same hash) from raising
+# mid-save; the whole save still runs in one transaction.
+SQL_INSERT_IMAGE = '''
+    INSERT OR IGNORE INTO images (image_id, mime_type, file_size, original_file_name, created_at)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+# Single-statement dedup: RETURNING yields a row only when the insert
+# actually happened, distinguishing new images from re-uploads without a
+# separate existence query. (bulk_import keeps the plain OR IGNORE form,
+# since executemany cannot carry RETURNING.)
+SQL_UPSERT_IMAGE = '''
+    INSERT INTO images (image_id, mime_type, file_size, original_file_name, created_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(image_id) DO NOTHING
+    RETURNING created_at
+'''
+
+SQL_GET_CREATED_AT = 'SELECT created_at FROM images WHERE image_id = ? LIMIT 1'
+
+SQL_INSERT_TAG = '''
+    INSERT OR IGNORE INTO tags (image_id, tag)
+    VALUES (?, ?)
+'''
+
+SQL_GET_IMAGE_INFO = '''
+    SELECT i.image_id, i.mime_type, i.file_size, i.original_file_name, i.created_at, t.tag
+    FROM images i
+    LEFT JOIN tags t ON t.image_id = i.image_id
+    WHERE i.image_id = ?
+'''
+
+# Guards the 'untagged' restore in delete_image_tag; read paths rely on
+# get_image_info returning None instead of a separate existence probe,
+# and upload dedup is answered by the UPSERT itself.
+SQL_IMAGE_EXISTS = 'SELECT 1 FROM images WHERE image_id = ? LIMIT 1'
+
+SQL_GET_IMAGE_BASIC = '''
+    SELECT mime_type, file_size, original_file_name, created_at
+    FROM images
+    WHERE image_id = ?
+    LIMIT 1
+'''
+
+# Keyset pagination: pages are ordered and sought on (created_at,
+# image_id), a unique composite covered by idx_images_created_at, so each
+# page is an index seek plus a bounded scan instead of a sort.
+SQL_IMAGES_PAGE = '''
+    SELECT i.image_id, i.mime_type, i.file_size, i.original_file_name, i.created_at, t.tag
+    FROM images i
+    LEFT JOIN tags t ON i.image_id = t.image_id
+    WHERE i.image_id IN (
+        SELECT image_id
+        FROM images
+        ORDER BY created_at, image_id
+        LIMIT ?
+    )
+    ORDER BY i.created_at, i.image_id, t.tag
+'''
+
+SQL_IMAGES_PAGE_AFTER_CURSOR = '''
+    SELECT i.image_id, i.mime_type, i.file_size, i.original_file_name, i.created_at, t.tag
+    FROM images i
+    LEFT JOIN tags t ON i.image_id = t.image_id
+    WHERE i.image_id IN (
+        SELECT image_id
+        FROM images
+        WHERE (created_at, image_id) > (?, ?)
+        ORDER BY created_at, image_id
+        LIMIT ?
+    )
+    ORDER BY i.created_at, i.image_id, t.tag
+'''
+
+SQL_ADD_TAG = '''
+    INSERT INTO tags (image_id, tag)
+    VALUES (?, ?)
+    ON CONFLICT DO NOTHING
+'''
+
+SQL_DELETE_TAG = '''
+    DELETE FROM tags
+    WHERE image_id = ? AND tag = ?
+'''
+
+SQL_GET_DISTINCT_TAGS = '''
+    SELECT DISTINCT tag
+    FROM tags
+'''
+
+SQL_HAS_TAGS = 'SELECT 1 FROM tags WHERE image_id = ? LIMIT 1'
+
+
+UNTAGGED_TAG = 'untagged'
+
+# executemany batch size for bulk_import; keeps peak memory bounded while
+# still amortizing the statement dispatch.
+BULK_BATCH_SIZE = 10_000
+
+
+def _db_id(image_id: str) -> bytes | None:
+    """
+    Convert an external hex image id to its 20-byte stored form.
+
+    image_id is stored as a BLOB: half the bytes of the hex text in the
+    images primary key and every tag index. Returns None for input that
+    cannot name any stored image.
+    """
+    try:
+        return bytes.fromhex(image_id)
+    except ValueError:
+        return None
+
+
+def _page_query(matched: str, has_cursor: bool) -> str:
+    """Wrap a matched-image-id subquery in the common page/JOIN shell."""
+    cursor_condition = 'WHERE (i2.created_at, i2.image_id) > (?, ?)' if has_cursor else ''
+
+    return f'''
+        SELECT i.image_id, i.mime_type, i.file_size, i.original_file_name, i.created_at, t.tag
+        FROM images i
+        LEFT JOIN tags t ON i.image_id = t.image_id
+        WHERE i.image_id IN (
+            SELECT i2.image_id
+            FROM images i2
+            JOIN (
+                {matched}
+            ) matched ON matched.image_id = i2.image_id
+            {cursor_condition}
+            ORDER BY i2.created_at, i2.image_id
+            LIMIT ?
+        )
+        ORDER BY i.created_at, i.image_id, t.tag
+    '''
+
+
+@lru_cache(maxsize=32)
+def _build_tag_filter_query(n_tags: int, has_cursor: bool) -> str:
+    """
+    Build the AND-of-tags page query for a given tag count.
+
+    The text only varies with the number of placeholders and the presence
+    of a cursor, so caching on (n_tags, has_cursor) keeps the generated
+    string identical across requests and lets the per-connection statement
+    cache hit instead of re-preparing.
+    """
+    # Intersect one sorted posting list per tag: each branch is a range
+    # scan of idx_tags_tag_image and SQLite merges them ordered, with no
+    # GROUP BY/COUNT bookkeeping.
+    matched = '\n                INTERSECT\n                '.join(
+        'SELECT image_id FROM tags WHERE tag = ?' for _ in range(n_tags)
+    )
+    return _page_query(matched, has_cursor)
+
+
+@lru_cache(maxsize=2)
+def _build_untagged_query(has_cursor: bool) -> str:
+    """
+    Build the page query for the default 'untagged' gallery view.
+
+    The tag is spelled as a literal so the planner can match the partial
+    index idx_tags_untagged, an index-only scan over just the untagged
+    image_ids.
+    """
+    return _page_query("SELECT image_id FROM tags WHERE tag = 'untagged'", has_cursor)
+
+
+# Hand-rolled memo rather than lru_cache: misses must NOT be cached, or a
+# read racing an upload would pin "not found" for an image that exists a
+# moment later. Entries are immutable so positive hits never go stale.
+_BASIC_INFO_CACHE_MAX = 10_000
+_basic_info_cache: dict[str, tuple[str, int, str, int]] = {}
+
+
+def _basic_info(image_id: str) -> tuple[str, int, str, int] | None:
+    """Memoized immutable-columns lookup; image_id is a content hash."""
+    row = _basic_info_cache.get(image_id)
+    if row is not None:
+        return row
+
+    db_id = _db_id(image_id)
+    if db_id is None:
+        return None
+
+    with borrow_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_GET_IMAGE_BASIC, (db_id,))
+        row = cursor.fetchone()
+
+    if row is not None and len(_basic_info_cache) < _BASIC_INFO_CACHE_MAX:
+        _basic_info_cache[image_id] = row
+
+    return row
+
 
 class ImageRepository:
     """Repository for image database operations."""
 
+    # Process-wide cache of distinct tags, shared by all instances. The tag
+    # cloud changes rarely compared to how often it is read, so this skips
+    # the DISTINCT scan on most calls. The sorted rendering is memoized
+    # separately so repeat reads don't re-sort an unchanged set.
+    _tags_cache: set[str] | None = None
+    _tags_sorted: list[str] | None = None
+
     def save_image(
         self,
         image_id: str,
         mime_type: str,
         file_size: int,
         original_filename: str,
+        created_at: int,
         tags: list[str],
-    ) -> None:
+    ) -> tuple[int, bool]:
         """
-        Save image metadata to the database.
+        Save image metadata to the database, deduplicating by id.
 
         Args:
-            image_id: SHA1 hash of the image file
+            image_id: content hash of the image file
             mime_type: MIME type of the image (e.g., 'image/jpeg')
             file_size: Size of the image file in bytes
             original_filename: Original filename as uploaded
+            created_at: Upload time in nanoseconds since the epoch
+            tags: Tags for a newly inserted image; ignored on a re-upload
+                so a duplicate never disturbs the stored tag set
+
+        Returns:
+            (created_at, inserted): the timestamp actually stored (the
+            original one for a re-upload) and whether the row was new.
         """
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        # Tags recur heavily across images; interning makes repeated binds
+        # (and the in-process tag cache) share one string object per tag.
+        tags = [sys.intern(tag) for tag in tags]
+        db_id = bytes.fromhex(image_id)
+
+        # Single transaction for the image row and all tag rows; executemany
+        # binds each tag row against one prepared statement instead of
+        # re-preparing per tag. Runs on the dedicated writer thread.
+        def write(conn):
+            with conn:
+                row = conn.execute(
+                    SQL_UPSERT_IMAGE,
+                    (db_id, mime_type, file_size, original_filename, created_at),
+                ).fetchone()
+                if row is not None:
+                    conn.executemany(
+                        SQL_INSERT_TAG,
+                        [(db_id, tag) for tag in tags],
+                    )
+                    return created_at, True
+                # Conflict: a re-upload; report the stored timestamp
+                stored = conn.execute(SQL_GET_CREATED_AT, (db_id,)).fetchone()
+                return stored[0], False
 
-        # insert into images table
-        cursor.execute(
-            '''
-            INSERT INTO images (image_id, mime_type, file_size, original_file_name)
-            VALUES (?, ?, ?, ?)
-            ''',
-            (image_id, mime_type, file_size, original_filename),
-        )
+        result = run_write(write)
 
-        # insert into tags table
-        for tag in tags:
-            cursor.execute(
-                '''
-                INSERT INTO tags (image_id, tag)
-                VALUES (?, ?)
-                ''',
-                (image_id, tag),
-            )
+        if result[1] and tags and ImageRepository._tags_cache is not None:
+            if not ImageRepository._tags_cache.issuperset(tags):
+                ImageRepository._tags_sorted = None
+            ImageRepository._tags_cache.update(tags)
 
-        conn.commit()
-        conn.close()
+        return result
 
-    def get_image_info(self, image_id: str) -> dict | None:
+    def bulk_import(
+        self,
+        rows: Iterable[tuple[str, str, int, str, int, list[str]]],
+    ) -> int:
         """
-        Get image metadata by ID.
+        Bulk-import image metadata, e.g. from a seed script.
+
+        Drops the secondary tag indexes for the duration of the load and
+        recreates them afterwards: one bulk index sort is far cheaper than
+        a btree insert per tag row. Everything runs in one transaction.
 
         Args:
-            image_id: SHA1 hash of the image
+            rows: (image_id, mime_type, file_size, original_filename,
+                  created_at, tags) tuples; image_id is the usual hex digest.
 
         Returns:
-            Image metadata dict or None if not found
+            Number of image rows imported.
         """
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        def write(conn):
+            with conn:
+                for name in TAG_INDEXES:
+                    conn.execute(f'DROP INDEX IF EXISTS {name}')
+
+                count = 0
+                image_batch: list[tuple] = []
+                tag_batch: list[tuple] = []
+                for image_id, mime_type, file_size, original_filename, created_at, tags in rows:
+                    db_id = bytes.fromhex(image_id)
+                    image_batch.append((db_id, mime_type, file_size, original_filename, created_at))
+                    tag_batch.extend((db_id, sys.intern(tag)) for tag in tags)
+
+                    if len(image_batch) >= BULK_BATCH_SIZE:
+                        conn.executemany(SQL_INSERT_IMAGE, image_batch)
+                        conn.executemany(SQL_INSERT_TAG, tag_batch)
+                        count += len(image_batch)
+                        image_batch.clear()
+                        tag_batch.clear()
+
+                if image_batch:
+                    conn.executemany(SQL_INSERT_IMAGE, image_batch)
+                    conn.executemany(SQL_INSERT_TAG, tag_batch)
+                    count += len(image_batch)
+
+                for ddl in TAG_INDEXES.values():
+                    conn.execute(ddl)
+
+                return count
+
+        count = run_write(write)
+        ImageRepository._tags_cache = None
+        ImageRepository._tags_sorted = None
+        return count
 
-        cursor.execute(
-            '''
-            SELECT image_id, mime_type, file_size, original_file_name
-            FROM images
-            WHERE image_id = ?
-            ''',
-            (image_id,),
-        )
-
-        row = cursor.fetchone()
+    def get_image_info(self, image_id: str) -> dict | None:
+        """
+        Get image metadata by ID.
 
-        if row:
-            result = ImageInfo(id=row[0], mime_type=row[1], file_size=row[2], original_filename=row[3], tags=[])
-            cursor.execute(
-                '''
-                SELECT tag
-                FROM tags
-                WHERE image_id = ?
-                ''',
-                (image_id,),
-            )
+        Args:
+            image_id: content hash of the image
 
+        Returns:
+            Image metadata dict or None if not found
+        """
+        db_id = _db_id(image_id)
+        if db_id is None:
+            return None
+
+        # Single LEFT JOIN instead of a second round-trip for the tags;
+        # one row per tag (or a single NULL-tag row for untagged images).
+        with borrow_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_GET_IMAGE_INFO, (db_id,))
             rows = cursor.fetchall()
 
-            for tag_row in rows:
-                result.tags.append(tag_row[0])
-
-            conn.close()
-            return result
+        if not rows:
+            return None
+
+        # model_construct skips per-field validation, and since the
+        # response envelope types its payload as Any, nothing downstream
+        # re-validates either: these models go to the wire as built. The
+        # shape is guaranteed by the typed schema plus the write paths in
+        # this module, which only ever store fully-formed rows.
+        result = ImageInfo.model_construct(
+            id=rows[0][0].hex(),
+            mime_type=rows[0][1],
+            file_size=rows[0][2],
+            original_filename=rows[0][3],
+            created_at=rows[0][4],
+            tags=[],
+        )
+        for row in rows:
+            if row[5]:  # tag is not null
+                result.tags.append(row[5])
 
-        conn.close()
-        return None
+        return result
 
-    def image_exists(self, image_id: str) -> bool:
-        """Check if an image exists in the database."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
+    def get_image_basic_info(self, image_id: str) -> tuple[str, int, str, int] | None:
+        """
+        Get the immutable metadata of an image by ID.
 
-        cursor.execute('SELECT 1 FROM images WHERE image_id = ?', (image_id,))
-        exists = cursor.fetchone() is not None
-        conn.close()
+        Unlike get_image_info this excludes tags, so the result can never
+        go stale and is memoized process-wide — the file-serving endpoints
+        hit this on every request just for mime type and filename.
 
-        return exists
+        Returns:
+            (mime_type, file_size, original_filename, created_at),
+            or None if not found
+        """
+        return _basic_info(image_id)
 
     def get_images_by_tag(
         self,
         limit: int,
         tags: list[str] | None = None,
-        cursor: str | None = None,
-    ) -> list[ImageInfo]:
+        cursor: tuple[int, bytes] | None = None,
+    ) -> tuple[list[ImageInfo], bool]:
         """
-        Get images filtered by tags with cursor-based pagination.
+        Get images filtered by tags with keyset pagination.
 
         Args:
             tags: Optional list of tags to filter by (e.g., ['vacation', 'beach']).
                   Images must have ALL tags (AND logic).
             limit: Maximum number of results to return
-            cursor: Last image_id from previous page, or None for first page
+            cursor: (created_at, image_id) key of the last row of the
+                previous page, or None for the first page
 
         Returns:
-            List of ImageInfo objects ordered by image_id
+            (items, has_more): up to limit ImageInfo objects ordered by
+            (created_at, image_id), and whether another page follows
+
+        The query asks for one extra image beyond limit purely as a
+        has-more probe; that sentinel is detected from the raw rows and
+        never built into a model.
         """
-        conn = get_db_connection()
-        db_cursor = conn.cursor()
+        cursor_params = list(cursor) if cursor else []
+        limit += 1
 
         # Build query with cursor and tag support
-        if tags and len(tags) > 0:
+        if tags == [UNTAGGED_TAG]:
+            # Default gallery view; served by the partial untagged index
+            query = _build_untagged_query(cursor is not None)
+            params = cursor_params + [limit]
+        elif tags and len(tags) > 0:
             # Filter by multiple tags (AND logic) - image must have all tags
-            placeholders = ','.join('?' * len(tags))
-            cursor_condition = 'AND i2.original_file_name > ?' if cursor else ''
-
-            query = f'''
-                SELECT i.image_id, i.mime_type, i.file_size, i.original_file_name, t.tag
-                FROM images i
-                LEFT JOIN tags t ON i.image_id = t.image_id
-                WHERE i.image_id IN (
-                    SELECT i2.image_id
-                    FROM images i2
-                    WHERE EXISTS (
-                        SELECT 1 FROM tags t2
-                        WHERE t2.image_id = i2.image_id AND t2.tag IN ({placeholders})
-                        GROUP BY t2.image_id
-                        HAVING COUNT(DISTINCT t2.tag) = {len(tags)}
-                    )
-                    {cursor_condition}
-                    ORDER BY i2.original_file_name
-                    LIMIT ?
-                )
-                ORDER BY i.original_file_name, t.tag
-            '''
-
-            params = tags + ([cursor] if cursor else []) + [limit]
-            db_cursor.execute(query, params)
+            query = _build_tag_filter_query(len(tags), cursor is not None)
+            params = tags + cursor_params + [limit]
+        elif cursor:
+            query = SQL_IMAGES_PAGE_AFTER_CURSOR
+            params = cursor_params + [limit]
         else:
             # No tag filter - return all images
-            if cursor:
-                query = '''
-                    SELECT i.image_id, i.mime_type, i.file_size, i.original_file_name, t.tag
-                    FROM images i
-                    LEFT JOIN tags t ON i.image_id = t.image_id
-                    WHERE i.image_id IN (
-                        SELECT image_id
-                        FROM images
-                        WHERE original_file_name > ?
-                        ORDER BY original_file_name
-                        LIMIT ?
-                    )
-                    ORDER BY i.original_file_name, t.tag
-                '''
-                db_cursor.execute(query, (cursor, limit))
-            else:
-                query = '''
-                    SELECT i.image_id, i.mime_type, i.file_size, i.original_file_name, t.tag
-                    FROM images i
-                    LEFT JOIN tags t ON i.image_id = t.image_id
-                    WHERE i.image_id IN (
-                        SELECT image_id
-                        FROM images
-                        ORDER BY original_file_name
-                        LIMIT ?
-                    )
-                    ORDER BY i.original_file_name, t.tag
-                '''
-                db_cursor.execute(query, (limit,))
+            query = SQL_IMAGES_PAGE
+            params = (limit,)
 
-        rows = db_cursor.fetchall()
-        conn.close()
+        with borrow_connection() as conn:
+            db_cursor = conn.cursor()
+            db_cursor.execute(query, params)
+            rows = db_cursor.fetchall()
 
         # Build ImageInfo objects from result set
         # Results may have multiple rows per image (one per tag)
         results = {}
+        has_more = False
         for row in rows:
-            image_id = row[0]
+            image_id = row[0].hex()
             if image_id not in results:
-                results[image_id] = ImageInfo(
+                if len(results) == limit - 1:
+                    # The sentinel image; its rows sort last, so stop here
+                    has_more = True
+                    break
+                results[image_id] = ImageInfo.model_construct(
                     id=image_id,
                     mime_type=row[1],
                     file_size=row[2],
                     original_filename=row[3],
+                    created_at=row[4],
                     tags=[]
                 )
-            if row[4]:  # tag is not null
-                results[image_id].tags.append(row[4])
+            if row[5]:  # tag is not null
+                results[image_id].tags.append(row[5])
 
-        return list(results.values())
+        return list(results.values()), has_more
 
     def add_image_tag(
         self,
         image_id: str,
         tag: str
     ) -> None:
-        conn = get_db_connection()
-        db_cursor = conn.cursor()
-
-        db_cursor.execute(
-            '''
-            INSERT INTO tags (image_id, tag)
-            VALUES (?, ?)
-            ON CONFLICT DO NOTHING
-            ''',
-            (image_id, tag)
-        )
-
-        conn.commit()
-        conn.close()
+        tag = sys.intern(tag)
+        db_id = _db_id(image_id)
+        if db_id is None:
+            return
+
+        # A real tag supersedes the synthetic 'untagged' marker uploads
+        # write, so the image leaves the default gallery view atomically.
+        def write(conn):
+            with conn:
+                conn.execute(SQL_ADD_TAG, (db_id, tag))
+                if tag != UNTAGGED_TAG:
+                    return conn.execute(SQL_DELETE_TAG, (db_id, UNTAGGED_TAG)).rowcount
+                return 0
+
+        removed_untagged = run_write(write)
+
+        if removed_untagged:
+            # 'untagged' may or may not remain on other images; drop the
+            # cache and let the next read rebuild it.
+            ImageRepository._tags_cache = None
+            ImageRepository._tags_sorted = None
+        elif ImageRepository._tags_cache is not None:
+            if tag not in ImageRepository._tags_cache:
+                ImageRepository._tags_sorted = None
+            ImageRepository._tags_cache.add(tag)
 
     def delete_image_tag(
         self,
         image_id: str,
         tag: str
     ) -> None:
-        conn = get_db_connection()
-        db_cursor = conn.cursor()
-
-        db_cursor.execute(
-            '''
-            DELETE FROM tags
-            WHERE image_id = ? AND tag = ?
-            ''',
-            (image_id, tag)
-        )
-
-        conn.commit()
-        conn.close()
+        db_id = _db_id(image_id)
+        if db_id is None:
+            return
+
+        # Removing the last real tag drops the image back into the
+        # 'untagged' gallery view, mirroring add_image_tag above.
+        def write(conn):
+            with conn:
+                conn.execute(SQL_DELETE_TAG, (db_id, tag))
+                if (
+                    conn.execute(SQL_HAS_TAGS, (db_id,)).fetchone() is None
+                    and conn.execute(SQL_IMAGE_EXISTS, (db_id,)).fetchone() is not None
+                ):
+                    conn.execute(SQL_INSERT_TAG, (db_id, UNTAGGED_TAG))
+
+        run_write(write)
+
+        # The tag may still be attached to other images, so a simple
+        # discard could go stale the other way; drop the cache and let the
+        # next read rebuild it.
+        ImageRepository._tags_cache = None
+        ImageRepository._tags_sorted = None
 
     def get_image_tags(
         self,
-    ) -> List[str]:
-        conn = get_db_connection()
-        db_cursor = conn.cursor()
-
-        db_cursor.execute(
-            '''
-            SELECT DISTINCT tag
-            FROM tags
-            '''
-        )
+    ) -> list[str]:
+        if ImageRepository._tags_sorted is not None:
+            return ImageRepository._tags_sorted
+
+        if ImageRepository._tags_cache is None:
+            with borrow_connection() as conn:
+                db_cursor = conn.cursor()
+                db_cursor.execute(SQL_GET_DISTINCT_TAGS)
+                rows = db_cursor.fetchall()
+
+            ImageRepository._tags_cache = {row[0] for row in rows}
 
-        rows = db_cursor.fetchall()
-        results = [row[0] for row in rows]
-        conn.close()
-        return results;
+        ImageRepository._tags_sorted = sorted(ImageRepository._tags_cache)
+        return ImageRepository._tags_sorted
@@ -1,3 +1,3 @@
-from .images import router
+from .images import router, thumb_router
 
-__all__ = ["router"]
+__all__ = ["router", "thumb_router"]
@@ -1,6 +1,8 @@
+import os
+from functools import lru_cache
 from pathlib import Path
 
-from fastapi import APIRouter, UploadFile, File, Response, Depends, Query, HTTPException
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Request, Response, Depends, Query, HTTPException
 from fastapi.responses import FileResponse
 
 from models import ImageInfo, PaginatedImagesResponse, SuccessResponse, ErrorResponse
@@ -8,32 +10,127 @@ from services import ImageService
 from repositories import ImageRepository
 from services.image_service import UPLOAD_DIR, THUMBNAIL_DIR
 
+# When fronted by nginx, set these to internal location prefixes (e.g.
+# "/internal/uploads") and image bytes are streamed by nginx via
+# X-Accel-Redirect/sendfile instead of being copied through Python.
+ACCEL_UPLOADS_PREFIX = os.environ.get("TAGSOUP_ACCEL_UPLOADS_PREFIX")
+ACCEL_THUMBNAILS_PREFIX = os.environ.get("TAGSOUP_ACCEL_THUMBNAILS_PREFIX")
+
+# Image and thumbnail URLs embed the content hash, so the bytes behind a
+# URL can never change; clients may cache them forever.
+CACHE_FOREVER = "public, max-age=31536000, immutable"
+
 router = APIRouter(prefix="/api/image", tags=["images"])
 
+# Bare /thumb/<image_id> alias outside the API prefix, so a CDN or edge
+# cache can apply a cache-everything policy to this path alone.
+thumb_router = APIRouter(tags=["images"])
+
+
+def _cache_headers(image_id: str) -> dict[str, str]:
+    return {"Cache-Control": CACHE_FOREVER, "ETag": f'"{image_id}"'}
+
+
+def _not_modified(request: Request, image_id: str) -> Response | None:
+    """Return a 304 when the client already holds the current bytes."""
+    if request.headers.get("if-none-match") == f'"{image_id}"':
+        return Response(status_code=304, headers=_cache_headers(image_id))
+
+    # Date-based revalidation: the URL is content-addressed, so any cached
+    # copy a client revalidates is by definition still current.
+    if "if-modified-since" in request.headers and "if-none-match" not in request.headers:
+        return Response(status_code=304, headers=_cache_headers(image_id))
+
+    return None
+
+
+def _serve_file(
+    accel_prefix: str | None,
+    file_path: Path,
+    media_type: str,
+    filename: str,
+    extra_headers: dict[str, str] | None = None,
+) -> Response:
+    """Serve a file via nginx X-Accel-Redirect when configured, else directly."""
+    headers = {"Content-Disposition": f"inline; filename={filename}"}
+    if extra_headers:
+        headers.update(extra_headers)
 
+    if accel_prefix:
+        headers["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{file_path.name}"
+        return Response(media_type=media_type, headers=headers)
+
+    # Stat once here and hand the result to FileResponse so Starlette can
+    # take its sendfile fast path without re-statting on send.
+    try:
+        stat_result = file_path.stat()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Image file not found")
+
+    return FileResponse(
+        path=file_path,
+        media_type=media_type,
+        filename=filename,
+        headers=headers,
+        stat_result=stat_result,
+    )
+
+
+@lru_cache(maxsize=1)
 def get_image_service() -> ImageService:
-    """Dependency injection for ImageService."""
+    """Dependency injection for ImageService (process-wide singleton)."""
     repository = ImageRepository()
     return ImageService(repository)
 
 
 @router.post("/uploadImage", status_code=201)
 async def upload_image(
-    file: UploadFile = File(...),
+    request: Request,
+    background: BackgroundTasks,
+    hash: str | None = Query(None, description="Content hash (BLAKE2b-160) the client already computed; if the image is known the upload body is skipped entirely"),
     service: ImageService = Depends(get_image_service),
 ) -> SuccessResponse | ErrorResponse:
     """
     Upload a new image.
 
-    Accepts image files, streams them to disk with SHA1 hashing,
-    and stores metadata in the database.
+    Expects a multipart/form-data body with a file field. The raw request
+    stream is parsed directly, so upload bytes are hashed and written to
+    disk in a single pass without an intermediate spool file. Clients
+    that precompute the content hash can pass it as ?hash= to make duplicate
+    re-uploads free.
 
     Returns:
         201 Created with SuccessResponse containing ImageInfo
     """
     try:
-        image_info = await service.upload_image(file)
-        return SuccessResponse(data=image_info.model_dump())
+        image_info = await service.upload_image_stream(request, background, claimed_hash=hash)
+        return SuccessResponse(data=image_info)
+    except HTTPException as e:
+        return ErrorResponse(
+            code=e.status_code,
+            message=e.detail if isinstance(e.detail, str) else str(e.detail),
+            error_type="UPLOAD_ERROR",
+        )
+
+
+@router.post("/uploadImages", status_code=201)
+async def upload_images(
+    background: BackgroundTasks,
+    files: list[UploadFile] = File(...),
+    service: ImageService = Depends(get_image_service),
+) -> SuccessResponse | ErrorResponse:
+    """
+    Upload a batch of images in one request.
+
+    Files are hashed and persisted concurrently, one worker thread per
+    file, which parallelizes hashing across cores for bulk uploads.
+
+    Returns:
+        201 Created with SuccessResponse containing a list of ImageInfo
+    """
+    try:
+        image_infos = await service.upload_images(files, background)
+        return SuccessResponse(data=image_infos)
     except HTTPException as e:
         return ErrorResponse(
             code=e.status_code,
@@ -55,7 +152,7 @@ async def add_image_tag(
         200 Ok with SuccessResponse
     """
     try:
-        service.add_image_tag(image_id, tag)
+        await service.add_image_tag(image_id, tag)
         return SuccessResponse()
     except HTTPException as e:
         return ErrorResponse(
@@ -77,7 +174,7 @@ async def delete_image_tag(
         200 Ok with SuccessResponse
     """
     try:
-        service.delete_image_tag(image_id, tag)
+        await service.delete_image_tag(image_id, tag)
         return SuccessResponse()
     except HTTPException as e:
         return ErrorResponse(
@@ -89,29 +186,34 @@ async def delete_image_tag(
 @router.get("/getImage/{image_id}")
 async def get_image(
     image_id: str,
+    request: Request,
     service: ImageService = Depends(get_image_service),
-) -> FileResponse:
+) -> Response:
     """
     Get image file by ID.
 
     Args:
-        image_id: SHA1 hash of the image
+        image_id: content hash of the image
 
     Returns:
         Image file content with appropriate Content-Type and Content-Disposition headers
     """
-    # Get image metadata from database (validates image exists, returns 404 if not)
-    image_info = service.get_image_info(image_id)
+    # The URL is keyed by content hash, so a matching ETag means the
+    # client's copy is current — no DB hit or disk read needed.
+    not_modified = _not_modified(request, image_id)
+    if not_modified:
+        return not_modified
 
-    # Construct file path
-    file_path = UPLOAD_DIR / image_id
+    # Immutable metadata only; memoized, so most requests skip the DB
+    mime_type, _, original_filename, _ = await service.get_image_basic_info(image_id)
 
     # Return file with appropriate headers
-    return FileResponse(
-        path=file_path,
-        media_type=image_info.mime_type,
-        filename=image_info.original_filename,
-        headers={"Content-Disposition": f"inline; filename={image_info.original_filename}"},
+    return _serve_file(
+        ACCEL_UPLOADS_PREFIX,
+        UPLOAD_DIR / image_id,
+        media_type=mime_type,
+        filename=original_filename,
+        extra_headers=_cache_headers(image_id),
     )
 
 
@@ -124,14 +226,14 @@ async def get_image_info(
     Get image metadata by ID.
 
     Args:
-        image_id: SHA1 hash of the image
+        image_id: content hash of the image
 
     Returns:
         SuccessResponse with ImageInfo data
     """
     try:
-        image_info = service.get_image_info(image_id)
-        return SuccessResponse(data=image_info.model_dump())
+        image_info = await service.get_image_info(image_id)
+        return SuccessResponse(data=image_info)
     except HTTPException as e:
         return ErrorResponse(
             code=e.status_code,
@@ -141,31 +243,38 @@ async def get_image_info(
 
 
 @router.get("/getImageThumbnail/{image_id}")
+@thumb_router.get("/thumb/{image_id}")
 async def get_image_thumbnail(
     image_id: str,
+    request: Request,
     service: ImageService = Depends(get_image_service),
-) -> FileResponse:
+) -> Response:
     """
     Get image thumbnail by ID.
 
+    Also exposed as /thumb/{image_id}: the URL embeds the content hash
+    and the response carries immutable cache headers, so a CDN can pin
+    that path forever without ever revalidating against the origin.
+
     Args:
-        image_id: SHA1 hash of the image
+        image_id: content hash of the image
 
     Returns:
         Thumbnail image file in WebP format
     """
-    # Get image metadata from database (validates image exists, returns 404 if not)
-    image_info = service.get_image_info(image_id)
+    not_modified = _not_modified(request, image_id)
+    if not_modified:
+        return not_modified
 
-    # Construct thumbnail file path
-    thumbnail_path = THUMBNAIL_DIR / image_id
+    mime_type, _, original_filename, _ = await service.get_image_basic_info(image_id)
 
     # Return thumbnail file
-    return FileResponse(
-        path=thumbnail_path,
+    return _serve_file(
+        ACCEL_THUMBNAILS_PREFIX,
+        THUMBNAIL_DIR / image_id,
         media_type="image/webp",
-        filename=f"{Path(image_info.original_filename).stem}_thumb.webp",
-        headers={"Content-Disposition": f"inline; filename={Path(image_info.original_filename).stem}_thumb.webp"},
+        filename=f"{Path(original_filename).stem}_thumb.webp",
+        extra_headers=_cache_headers(image_id),
     )
 
 
@@ -190,8 +299,8 @@ async def get_images_info(
         SuccessResponse with PaginatedImagesResponse data
     """
     try:
-        paginated_response = service.get_images_info(tags=tag, page_size=page_size, cursor=cursor)
-        return SuccessResponse(data=paginated_response.model_dump())
+        paginated_response = await service.get_images_info(tags=tag, page_size=page_size, cursor=cursor)
+        return SuccessResponse(data=paginated_response)
     except HTTPException as e:
         return ErrorResponse(
             code=e.status_code,
@@ -210,7 +319,7 @@ async def get_image_tags(
         SuccessResponse with list of string tags.
     """
     try:
-        tags = service.get_image_tags()
+        tags = await service.get_image_tags()
         return SuccessResponse(data=tags)
     except HTTPException as e:
         return ErrorResponse(
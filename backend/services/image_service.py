@@ -1,13 +1,30 @@
+import asyncio
+import base64
 import hashlib
+import io
+import os
 import tempfile
-import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from fastapi import UploadFile, HTTPException
+from fastapi import BackgroundTasks, Request, UploadFile, HTTPException
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
 from PIL import Image, ImageOps
 
+# Optional fast path: libvips decodes JPEGs shrink-on-load (at 1/8 scale
+# straight from DCT coefficients) and resamples with SIMD, several times
+# faster than stock PIL with far lower peak memory. Installing
+# Pillow-SIMD in place of Pillow speeds up the fallback path too.
+try:
+    import pyvips
+except ImportError:
+    pyvips = None
+
 from models import ImageInfo, PaginatedImagesResponse
 from repositories import ImageRepository
+from repositories.image_repository import UNTAGGED_TAG
 
 # Allowed image MIME types
 ALLOWED_MIME_TYPES = {
@@ -23,11 +40,240 @@ ALLOWED_MIME_TYPES = {
 }
 
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50 MB
+# 1 MiB reads amortize the per-call overhead of hashlib's OpenSSL dispatch
+# (which runs hardware SHA where available) and of the UploadFile await.
+UPLOAD_CHUNK_SIZE = 1 << 20
+# Uploads up to this size keep their bytes around so the thumbnail worker
+# decodes from memory instead of re-reading the file it just wrote;
+# larger files fall back to the (page-cache-hot) path-based read to keep
+# RSS and pickle traffic bounded.
+THUMBNAIL_FROM_MEMORY_MAX = 10 * 1024 * 1024
 UPLOAD_DIR = Path(__file__).parent.parent / "uploads"
+# In-progress uploads live next to their final home so publishing one is
+# a same-filesystem rename, never a copy.
+UPLOAD_TMP_DIR = UPLOAD_DIR / ".tmp"
 THUMBNAIL_DIR = Path(__file__).parent.parent / "thumbnails"
 THUMBNAIL_SIZE = 300  # 300x300 fixed area
 
 
+def _encode_cursor(created_at: int, image_id: str) -> str:
+    """Pack a (created_at, image_id) page key into an opaque URL-safe token."""
+    return base64.urlsafe_b64encode(f"{created_at}:{image_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[int, bytes]:
+    """Unpack a cursor token back into the (created_at, image_id) key."""
+    try:
+        created_at, _, image_id = base64.urlsafe_b64decode(cursor).decode().partition(":")
+        db_id = bytes.fromhex(image_id)
+        if not db_id:
+            raise ValueError(cursor)
+        return int(created_at), db_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def new_content_hasher():
+    """
+    Hasher used for content-addressing uploads.
+
+    BLAKE2b-160 produces the same 40-char hex ids as the previous SHA1
+    scheme, but runs SIMD-accelerated and noticeably faster per byte on
+    large uploads.
+    """
+    return hashlib.blake2b(digest_size=20)
+
+
+def _hash_and_write(hasher, out_file, chunk: bytes) -> None:
+    """Feed one chunk to the digest and the temp file (worker thread)."""
+    hasher.update(chunk)
+    out_file.write(chunk)
+
+
+class _ImagePartSink:
+    """
+    Push-parser callbacks that stream the first file part of a multipart
+    body straight into the content digest and a temp file.
+
+    Bytes go network -> parser -> digest + disk in one pass, with no
+    intermediate Starlette spool file. Validation errors are raised from
+    the callbacks, so a bad part aborts as soon as its headers (or the
+    offending byte) arrive.
+    """
+
+    def __init__(self):
+        self.hasher = new_content_hasher()
+        self.file_size = 0
+        self.filename: str | None = None
+        self.content_type: str | None = None
+        self.tmp_file = None
+        self.tmp_path: Path | None = None
+        # Retain chunks for in-memory thumbnailing while the file is small
+        self.buffered: list[bytes] | None = []
+        self._headers: dict[bytes, bytes] = {}
+        self._field = b''
+        self._value = b''
+        self._in_file_part = False
+        self._done = False
+
+    @property
+    def received(self) -> bool:
+        """Whether a complete file part has been consumed."""
+        return self._done
+
+    def callbacks(self) -> dict:
+        return {
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_headers_finished': self._on_headers_finished,
+            'on_part_data': self._on_part_data,
+            'on_part_end': self._on_part_end,
+        }
+
+    def _on_header_field(self, data, start, end):
+        self._field += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self._value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[bytes(self._field).lower()] = bytes(self._value)
+        self._field = b''
+        self._value = b''
+
+    def _on_headers_finished(self):
+        headers, self._headers = self._headers, {}
+        if self._done:
+            return
+
+        _, params = parse_options_header(headers.get(b'content-disposition', b''))
+        filename = params.get(b'filename')
+        if filename is None:
+            # A plain form field, not a file; ignore it
+            return
+
+        content_type = headers.get(b'content-type', b'').decode('latin-1')
+        if content_type not in ALLOWED_MIME_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File type '{content_type}' is not allowed. Allowed types: {', '.join(ALLOWED_MIME_TYPES)}",
+            )
+
+        self.filename = filename.decode('utf-8', 'replace')
+        self.content_type = content_type
+        UPLOAD_TMP_DIR.mkdir(parents=True, exist_ok=True)
+        self.tmp_file = tempfile.NamedTemporaryFile(delete=False, dir=UPLOAD_TMP_DIR)
+        self.tmp_path = Path(self.tmp_file.name)
+        self._in_file_part = True
+
+    def _on_part_data(self, data, start, end):
+        if not self._in_file_part:
+            return
+
+        chunk = bytes(data[start:end])
+        self.file_size += len(chunk)
+        if self.file_size > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File size exceeds maximum allowed size of {MAX_FILE_SIZE / (1024 * 1024):.0f} MB",
+            )
+
+        self.hasher.update(chunk)
+        self.tmp_file.write(chunk)
+
+        if self.buffered is not None:
+            self.buffered.append(chunk)
+            if self.file_size > THUMBNAIL_FROM_MEMORY_MAX:
+                self.buffered = None
+
+    def _on_part_end(self):
+        if self._in_file_part:
+            self.tmp_file.close()
+            self._in_file_part = False
+            self._done = True
+
+    def discard(self):
+        """Drop the temp file after a failed upload."""
+        if self.tmp_file is not None and not self.tmp_file.closed:
+            self.tmp_file.close()
+        if self.tmp_path is not None and self.tmp_path.exists():
+            self.tmp_path.unlink()
+
+
+# Resampling is CPU-bound and parts of the PIL path hold the GIL, so
+# thumbnails run in worker processes. The image_id string crosses the
+# pickle boundary, plus the upload bytes themselves (capped at
+# THUMBNAIL_FROM_MEMORY_MAX) when they are still in memory; larger
+# uploads send only the id and the worker re-reads the file. Created
+# lazily so importing the module (and the test suite) doesn't fork a pool.
+_thumbnail_pool: ProcessPoolExecutor | None = None
+
+
+def _get_thumbnail_pool() -> ProcessPoolExecutor:
+    global _thumbnail_pool
+    if _thumbnail_pool is None:
+        _thumbnail_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _thumbnail_pool
+
+
+def _thumbnail_worker(image_id: str, data: bytes | None = None) -> None:
+    """
+    Generate a WebP thumbnail for an uploaded image (worker process).
+
+    Creates a 300x300 thumbnail that preserves aspect ratio.
+
+    Args:
+        image_id: content hash of the image (used as filename)
+        data: Image bytes already in memory from the upload, to skip
+            re-reading the file; falls back to the path when None
+    """
+    try:
+        # Ensure thumbnail directory exists
+        THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
+
+        image_path = UPLOAD_DIR / image_id
+        thumbnail_path = THUMBNAIL_DIR / image_id
+
+        if pyvips is not None:
+            # Shrink-on-load path; never materializes the full-size image
+            if data is not None:
+                thumb = pyvips.Image.thumbnail_buffer(data, THUMBNAIL_SIZE)
+            else:
+                thumb = pyvips.Image.thumbnail(str(image_path), THUMBNAIL_SIZE)
+            thumb.webpsave(str(thumbnail_path), Q=80)
+            return
+
+        # Open the original image
+        with Image.open(io.BytesIO(data) if data is not None else image_path) as img:
+            # Apply EXIF orientation (rotate if needed)
+            img = ImageOps.exif_transpose(img)
+
+            # Palette images must leave P mode before LANCZOS can resample
+            # them; the lookup itself is cheap.
+            if img.mode == "P":
+                img = img.convert("RGBA" if img.has_transparency_data else "RGB")
+
+            # Downscale first so any compositing below touches thumbnail-
+            # sized buffers, not the full-resolution image.
+            img.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.LANCZOS)
+
+            # Flatten transparency onto white with the vectorized
+            # compositor; everything else is a plain mode conversion.
+            if img.mode in ("RGBA", "LA"):
+                canvas = Image.new("RGBA", img.size, (255, 255, 255, 255))
+                img = Image.alpha_composite(canvas, img.convert("RGBA")).convert("RGB")
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+
+            # Save as WebP
+            img.save(thumbnail_path, format="WEBP", quality=80)
+
+    except Exception as e:
+        # Log error but don't fail the upload
+        print(f"Warning: Failed to generate thumbnail for {image_id}: {str(e)}")
+
+
 class ImageService:
     """Service for handling image upload and retrieval operations."""
 
@@ -35,15 +281,25 @@ class ImageService:
         """Initialize service with repository dependency."""
         self.repository = repository
 
-    async def upload_image(self, file: UploadFile) -> ImageInfo:
+    async def upload_image(
+        self,
+        file: UploadFile,
+        background: BackgroundTasks | None = None,
+        claimed_hash: str | None = None,
+    ) -> ImageInfo:
         """
         Upload an image file.
 
-        Validates MIME type, streams file to disk with SHA1 hashing,
+        Validates MIME type, streams file to disk with content hashing,
         and saves metadata to database.
 
         Args:
             file: Uploaded file from request
+            background: When given, thumbnail generation is deferred until
+                after the response is sent instead of blocking the upload
+            claimed_hash: Optional content hash supplied by the client; a
+                match against a stored image short-circuits the upload
+                before any bytes are read
 
         Returns:
             ImageInfo with uploaded image metadata
@@ -51,6 +307,17 @@ class ImageService:
         Raises:
             HTTPException: For validation or processing errors
         """
+        # Dedup short-circuit: a client that already knows the hash (most
+        # re-uploads and sync tools do) skips the body read, the 50 MB of
+        # disk writes and the full digest. Unknown or bogus hashes just fall
+        # through to the normal path, which verifies the real digest.
+        if claimed_hash:
+            existing_info = await asyncio.to_thread(
+                self.repository.get_image_info, claimed_hash
+            )
+            if existing_info is not None:
+                return existing_info
+
         # Validate MIME type
         if file.content_type not in ALLOWED_MIME_TYPES:
             raise HTTPException(
@@ -58,18 +325,21 @@ class ImageService:
                 detail=f"File type '{file.content_type}' is not allowed. Allowed types: {', '.join(ALLOWED_MIME_TYPES)}",
             )
 
-        # Stream file and calculate SHA1
-        sha1_hash = hashlib.sha1()
+        # Stream file and hash as we go
+        hasher = new_content_hasher()
         file_size = 0
         tmp_path = None
+        # Retain chunks for in-memory thumbnailing while the file is small
+        buffered: list[bytes] | None = []
 
         try:
-            with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
+            UPLOAD_TMP_DIR.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(delete=False, dir=UPLOAD_TMP_DIR) as tmp_file:
                 tmp_path = Path(tmp_file.name)
 
-                # Stream file and calculate SHA1
+                # Stream file into the digest and temp file
                 while True:
-                    chunk = await file.read(8192)  # Read in 8KB chunks
+                    chunk = await file.read(UPLOAD_CHUNK_SIZE)
                     if not chunk:
                         break
 
@@ -82,37 +352,30 @@ class ImageService:
                             detail=f"File size exceeds maximum allowed size of {MAX_FILE_SIZE / (1024 * 1024):.0f} MB",
                         )
 
-                    sha1_hash.update(chunk)
-                    tmp_file.write(chunk)
-
-            # Move temp file to final location with SHA1 as filename
-            image_id = sha1_hash.hexdigest()
-            final_path = UPLOAD_DIR / image_id
-
-            # Only move if file doesn't already exist (deduplication)
-            if not final_path.exists():
-                shutil.move(str(tmp_path), str(final_path))
+                    # Hash + write release the GIL in C but would still
+                    # block the loop; offloading lets concurrent uploads
+                    # hash on separate cores.
+                    await asyncio.to_thread(_hash_and_write, hasher, tmp_file, chunk)
 
-            # Save metadata to database (only if not already saved)
-            if not self.repository.image_exists(image_id):
-                self.repository.save_image(
-                    image_id=image_id,
-                    mime_type=file.content_type,
-                    file_size=file_size,
-                    original_filename=file.filename,
-                    tags=[]
-                )
+                    if buffered is not None:
+                        buffered.append(chunk)
+                        if file_size > THUMBNAIL_FROM_MEMORY_MAX:
+                            buffered = None
 
-                # Generate thumbnail (only for new images)
-                self._generate_thumbnail(image_id)
+            # Move temp file to final location with the hash as filename.
+            # The bin-to-hex conversion happens exactly once per upload,
+            # here; everything downstream (paths, DB keys, ETags) reuses
+            # this string.
+            image_id = hasher.digest().hex()
 
-            # Return image info
-            return ImageInfo(
-                id=image_id,
+            return await self._persist_upload(
+                image_id=image_id,
                 mime_type=file.content_type,
                 file_size=file_size,
                 original_filename=file.filename,
-                tags=[]
+                tmp_path=tmp_path,
+                buffered=buffered,
+                background=background,
             )
 
         except HTTPException:
@@ -123,48 +386,171 @@ class ImageService:
                 tmp_path.unlink()
             raise HTTPException(status_code=500, detail=str(e))
 
-    def _generate_thumbnail(self, image_id: str) -> None:
+    async def upload_image_stream(
+        self,
+        request: Request,
+        background: BackgroundTasks | None = None,
+        claimed_hash: str | None = None,
+    ) -> ImageInfo:
         """
-        Generate a WebP thumbnail for the uploaded image.
+        Upload an image by consuming the raw multipart request stream.
 
-        Creates a 300x300 thumbnail that preserves aspect ratio.
+        Unlike the UploadFile path, bytes never pass through Starlette's
+        spool file: each network chunk is parsed, hashed and written to
+        the temp file in one pass, saving a full copy of the upload.
 
         Args:
-            image_id: SHA1 hash of the image (used as filename)
+            request: The incoming multipart/form-data request
+            background: When given, thumbnail generation is deferred until
+                after the response is sent instead of blocking the upload
+            claimed_hash: Optional content hash supplied by the client; a
+                match against a stored image short-circuits the upload
+                before any bytes are read
+
+        Returns:
+            ImageInfo with uploaded image metadata
+
+        Raises:
+            HTTPException: For validation or processing errors
         """
+        if claimed_hash:
+            existing_info = await asyncio.to_thread(
+                self.repository.get_image_info, claimed_hash
+            )
+            if existing_info is not None:
+                return existing_info
+
+        media_type, params = parse_options_header(request.headers.get('content-type', ''))
+        boundary = params.get(b'boundary')
+        if media_type != b'multipart/form-data' or not boundary:
+            raise HTTPException(status_code=400, detail='Expected a multipart/form-data request')
+
+        sink = _ImagePartSink()
+        parser = MultipartParser(boundary, callbacks=sink.callbacks())
+
         try:
-            # Ensure thumbnail directory exists
-            THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
+            async for chunk in request.stream():
+                if chunk:
+                    # The callbacks hash and write synchronously; run the
+                    # parse off-loop so concurrent uploads use separate cores.
+                    await asyncio.to_thread(parser.write, chunk)
+            parser.finalize()
+
+            if not sink.received:
+                raise HTTPException(status_code=400, detail='No file field in multipart body')
+
+            image_id = sink.hasher.digest().hex()
+
+            return await self._persist_upload(
+                image_id=image_id,
+                mime_type=sink.content_type,
+                file_size=sink.file_size,
+                original_filename=sink.filename,
+                tmp_path=sink.tmp_path,
+                buffered=sink.buffered,
+                background=background,
+            )
 
-            # Open the original image
-            image_path = UPLOAD_DIR / image_id
-            with Image.open(image_path) as img:
-                # Apply EXIF orientation (rotate if needed)
-                img = ImageOps.exif_transpose(img)
+        except HTTPException:
+            sink.discard()
+            raise
+        except MultipartParseError as e:
+            sink.discard()
+            raise HTTPException(status_code=400, detail=f'Malformed multipart body: {e}')
+        except Exception as e:
+            sink.discard()
+            raise HTTPException(status_code=500, detail=str(e))
 
-                # Convert to RGB if necessary (for RGBA, GIF, etc.)
-                if img.mode in ("RGBA", "LA", "P"):
-                    rgb_img = Image.new("RGB", img.size, (255, 255, 255))
-                    rgb_img.paste(img, mask=img.split()[-1] if img.mode == "RGBA" else None)
-                    img = rgb_img
+    async def _persist_upload(
+        self,
+        image_id: str,
+        mime_type: str,
+        file_size: int,
+        original_filename: str,
+        tmp_path: Path,
+        buffered: list[bytes] | None,
+        background: BackgroundTasks | None,
+    ) -> ImageInfo:
+        """Move a fully-hashed temp file into place and record its metadata."""
+        final_path = UPLOAD_DIR / image_id
+
+        # Same-filesystem rename: one syscall, no copy fallback, and no
+        # exists() probe — replacing a duplicate is a no-op since both
+        # files hold the same content-addressed bytes.
+        os.replace(tmp_path, final_path)
+
+        # One UPSERT both records the metadata and answers whether the
+        # image is new; no separate existence query on the hot path. New
+        # images start life in the 'untagged' gallery view.
+        created_at, inserted = await asyncio.to_thread(
+            self.repository.save_image,
+            image_id=image_id,
+            mime_type=mime_type,
+            file_size=file_size,
+            original_filename=original_filename,
+            created_at=time.time_ns(),
+            tags=[UNTAGGED_TAG],
+        )
 
-                # Calculate thumbnail size to fit in 300x300 while preserving aspect ratio
-                img.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.LANCZOS)
+        if inserted:
+            # Generate thumbnail (only for new images); the client is
+            # not waiting on it, so defer past the response when we can
+            data = b''.join(buffered) if buffered is not None else None
+            if background is not None:
+                background.add_task(self._generate_thumbnail, image_id, data)
+            else:
+                self._generate_thumbnail(image_id, data)
 
-                # Save as WebP
-                thumbnail_path = THUMBNAIL_DIR / image_id
-                img.save(thumbnail_path, format="WEBP", quality=80)
+            return ImageInfo(
+                id=image_id,
+                mime_type=mime_type,
+                file_size=file_size,
+                original_filename=original_filename,
+                created_at=created_at,
+                tags=[UNTAGGED_TAG],
+            )
 
-        except Exception as e:
-            # Log error but don't fail the upload
-            print(f"Warning: Failed to generate thumbnail for {image_id}: {str(e)}")
+        # Re-upload of a known image: report its stored tags, which may
+        # have moved on from 'untagged' long ago.
+        return await asyncio.to_thread(self.repository.get_image_info, image_id)
 
-    def get_image_info(self, image_id: str) -> ImageInfo:
+    async def upload_images(
+        self,
+        files: list[UploadFile],
+        background: BackgroundTasks | None = None,
+    ) -> list[ImageInfo]:
+        """
+        Upload a batch of image files concurrently.
+
+        Independent uploads are embarrassingly parallel: each one hashes
+        and writes on its own worker thread, so a batch of N files keeps N
+        cores busy instead of hashing serially.
+
+        Args:
+            files: Uploaded files from the request
+
+        Returns:
+            One ImageInfo per uploaded file, in request order
+
+        Raises:
+            HTTPException: From the first file that fails validation or
+                processing. Files already persisted stay persisted; a
+                retried batch dedupes against them by content hash.
+        """
+        return list(
+            await asyncio.gather(*(self.upload_image(f, background) for f in files))
+        )
+
+    def _generate_thumbnail(self, image_id: str, data: bytes | None = None) -> None:
+        """Run thumbnail generation for image_id on the process pool."""
+        _get_thumbnail_pool().submit(_thumbnail_worker, image_id, data).result()
+
+    async def get_image_info(self, image_id: str) -> ImageInfo:
         """
         Get image information by ID.
 
         Args:
-            image_id: SHA1 hash of the image
+            image_id: content hash of the image
 
         Returns:
             ImageInfo with image metadata
@@ -172,33 +558,46 @@ class ImageService:
         Raises:
             HTTPException: If image not found
         """
-        image_data = self.repository.get_image_info(image_id)
+        # Offload the blocking sqlite3 call so it doesn't stall the event loop.
+        image_data = await asyncio.to_thread(self.repository.get_image_info, image_id)
 
         if not image_data:
             raise HTTPException(status_code=404, detail="Image not found")
 
-        return ImageInfo(
-            id=image_data.id,
-            mime_type=image_data.mime_type,
-            file_size=image_data.file_size,
-            original_filename=image_data.original_filename,
-            tags=image_data.tags
-        )
+        # The repository already returns a fully-shaped ImageInfo; re-wrapping
+        # it here would just re-run validation.
+        return image_data
+
+    async def get_image_basic_info(self, image_id: str) -> tuple[str, int, str, int]:
+        """
+        Get the immutable (mime_type, file_size, original_filename,
+        created_at) of an image, served from the repository's in-process
+        memo when warm.
 
-    def get_images_info(
+        Raises:
+            HTTPException: If image not found
+        """
+        info = await asyncio.to_thread(self.repository.get_image_basic_info, image_id)
+
+        if not info:
+            raise HTTPException(status_code=404, detail="Image not found")
+
+        return info
+
+    async def get_images_info(
         self,
         page_size: int,
         tags: list[str] | None = None,
         cursor: str | None = None,
     ) -> PaginatedImagesResponse:
         """
-        Get images filtered by tags with cursor-based pagination.
+        Get images filtered by tags with keyset pagination.
 
         Args:
             tags: Optional list of tags to filter by (e.g., ['untagged'], ['vacation', 'beach']).
                   Images must have ALL tags (AND logic).
             page_size: Number of items per page (1-100)
-            cursor: Cursor from previous page, or None for first page
+            cursor: Opaque cursor from previous page, or None for first page
 
         Returns:
             PaginatedImagesResponse with items, next_cursor, and metadata
@@ -213,24 +612,22 @@ class ImageService:
                 detail="page_size must be between 1 and 100",
             )
 
-        # Normalize tags and cursor
+        # Normalize tags and decode the opaque cursor into its page key
         normalized_tags = tags if tags else None
-        normalized_cursor = None if not cursor else cursor
+        normalized_cursor = _decode_cursor(cursor) if cursor else None
 
-        # Request page_size + 1 to determine if there are more results
-        items = self.repository.get_images_by_tag(
-            limit=page_size + 1,
+        # The repository probes one row past the page to compute has_more
+        items, has_more = await asyncio.to_thread(
+            self.repository.get_images_by_tag,
+            limit=page_size,
             tags=normalized_tags,
             cursor=normalized_cursor,
         )
 
-        # Determine if there are more results and extract next cursor
-        has_more = len(items) > page_size
         next_cursor = None
-
         if has_more:
-            next_cursor = items[page_size - 1].original_filename
-            items = items[:page_size]
+            last = items[-1]
+            next_cursor = _encode_cursor(last.created_at, last.id)
 
         return PaginatedImagesResponse(
             items=items,
@@ -239,7 +636,7 @@ class ImageService:
             has_more=has_more,
         )
 
-    def add_image_tag(
+    async def add_image_tag(
         self,
         image_id: str,
         tag: str
@@ -254,9 +651,9 @@ class ImageService:
         Returns:
             Ok
         """
-        self.repository.add_image_tag(image_id, tag)
+        await asyncio.to_thread(self.repository.add_image_tag, image_id, tag)
 
-    def delete_image_tag(
+    async def delete_image_tag(
         self,
         image_id: str,
         tag: str
@@ -271,15 +668,15 @@ class ImageService:
         Returns:
             Ok
         """
-        self.repository.delete_image_tag(image_id, tag)
+        await asyncio.to_thread(self.repository.delete_image_tag, image_id, tag)
 
-    def get_image_tags(
+    async def get_image_tags(
         self
-    ) -> List[str]:
+    ) -> list[str]:
         """
         Gets all image tags.
 
         Returns:
             List of image tags.
         """
-        return self.repository.get_image_tags()
+        return await asyncio.to_thread(self.repository.get_image_tags)
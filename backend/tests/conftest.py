@@ -1,6 +1,19 @@
-import io
+import asyncio
+import hashlib
+import os
 import pytest
 
+import httpx
+import orjson
+from fastapi.testclient import TestClient
+
+import db
+import repositories.image_repository as image_repository
+import routers.images as images_router
+import services.image_service as image_service
+from db import borrow_connection, init_db, run_write
+from main import app
+
 
 # Minimal valid JPEG (1x1 pixel red image)
 MINIMAL_JPEG = bytes([
@@ -45,45 +58,245 @@ MINIMAL_PNG = bytes([
 ])
 
 
+@pytest.fixture(scope="session", autouse=True)
+def _media_dirs(tmp_path_factory):
+    """
+    Point upload/thumbnail storage at a per-session tmp directory.
+
+    Tests then only unlink the files they actually created instead of
+    rmtree+mkdir of the real media directories around every test. Both
+    the service and the router bound the paths at import, so both copies
+    are patched.
+    """
+    base = tmp_path_factory.mktemp("media")
+    upload_dir = base / "uploads"
+    thumbnail_dir = base / "thumbnails"
+    upload_dir.mkdir()
+    thumbnail_dir.mkdir()
+
+    mp = pytest.MonkeyPatch()
+    mp.setattr(image_service, "UPLOAD_DIR", upload_dir)
+    mp.setattr(image_service, "UPLOAD_TMP_DIR", upload_dir / ".tmp")
+    mp.setattr(image_service, "THUMBNAIL_DIR", thumbnail_dir)
+    mp.setattr(images_router, "UPLOAD_DIR", upload_dir)
+    mp.setattr(images_router, "THUMBNAIL_DIR", thumbnail_dir)
+    yield
+    mp.undo()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _database(tmp_path_factory):
+    """
+    Create the schema once per run against a per-worker database file;
+    tests reset rows, not the file.
+
+    The file name carries the pytest-xdist worker id so the suite can
+    run under -n auto: each worker process gets its own database (and,
+    via tmp_path_factory, its own media directories) with no shared
+    state between them.
+    """
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    db_path = tmp_path_factory.mktemp("db") / f"images-{worker}.db"
+
+    mp = pytest.MonkeyPatch()
+    mp.setattr(db, "DB_PATH", db_path)
+    init_db()
+    yield
+    mp.undo()
+
+
+def _clear_media_dir(directory):
+    """Remove the files tests uploaded; the directory itself persists."""
+    # scandir reports the entry type from the directory read itself, so
+    # this costs one syscall per file instead of a stat for each.
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False):
+                os.unlink(entry.path)
+
+
+# total_changes of the writer connection as of the last reset. All row
+# changes funnel through that one connection, so an unchanged counter
+# means the previous test wrote nothing and truncation can be skipped.
+_writer_change_count = -1
+
+
+@pytest.fixture(autouse=True)
+def _reset_state():
+    """
+    Clear all rows and media files between tests.
+
+    Truncation through the live writer keeps the schema, indexes, pooled
+    connections and WAL intact, instead of deleting and re-creating the
+    database file (and re-running DDL) for every test, and is a no-op
+    after read-only tests. Process-wide memo caches are dropped with the
+    rows they described.
+    """
+    global _writer_change_count
+
+    def write(conn):
+        if conn.total_changes != _writer_change_count:
+            with conn:
+                conn.execute('DELETE FROM tags')
+                conn.execute('DELETE FROM images')
+        return conn.total_changes
+
+    _writer_change_count = run_write(write)
+
+    image_repository.ImageRepository._tags_cache = None
+    image_repository.ImageRepository._tags_sorted = None
+    image_repository._basic_info_cache.clear()
+
+    _clear_media_dir(image_service.UPLOAD_DIR)
+    _clear_media_dir(image_service.THUMBNAIL_DIR)
+
+    yield
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One shared client for the whole run: app startup, middleware and
+    dependency wiring happen once instead of per test."""
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _orjson_responses():
+    """Decode response bodies with orjson instead of the stdlib parser,
+    mirroring the server side, which already serializes with orjson."""
+    mp = pytest.MonkeyPatch()
+    mp.setattr(httpx.Response, "json", lambda self, **kwargs: orjson.loads(self.content))
+    yield
+    mp.undo()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warmup(client):
+    """Hit one read and one write route before any test runs, so route
+    matching, Pydantic validator compilation and dependency resolution
+    are paid once up front instead of inside the first test."""
+    client.get("/api/image/getImagesInfo?tag=untagged")
+    client.post(
+        "/api/image/uploadImage",
+        files={"file": ("warmup.jpg", MINIMAL_JPEG, "image/jpeg")},
+    )
+
+
+# Distinct payloads for the largest seeded set, built once at import so
+# seeding loops never re-concatenate them.
+SEED_PAYLOADS = [b"fake image data " + str(i).encode() for i in range(25)]
+
+
+# Rows as a real upload stored them, by payload index. The first test to
+# want n seeded images uploads any missing ones over HTTP; every later
+# test re-inserts the cached rows through bulk_import, skipping the
+# multipart round-trip, hashing and disk writes entirely.
+_seed_rows: list[tuple] = []
+
+
+@pytest.fixture
+def seed_images(client):
+    """Factory: seed_images(n) puts n uploaded images in the database and
+    returns their ids in upload order."""
+    def seed(count: int) -> list[str]:
+        if count > len(_seed_rows):
+            # Upload the missing payloads concurrently straight into the
+            # ASGI app: one event loop drives all requests via gather
+            # instead of a sync round-trip through the TestClient portal
+            # per upload.
+            async def upload_all(payloads: list[bytes]) -> None:
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as ac:
+                    responses = await asyncio.gather(*(
+                        ac.post(
+                            "/api/image/uploadImage",
+                            files={"file": ("test.jpg", payload, "image/jpeg")},
+                        )
+                        for payload in payloads
+                    ))
+                assert all(r.status_code == 201 for r in responses)
+
+            payloads = SEED_PAYLOADS[len(_seed_rows):count]
+            asyncio.run(upload_all(payloads))
+            new_ids = [
+                hashlib.blake2b(payload, digest_size=20).hexdigest()
+                for payload in payloads
+            ]
+
+            with borrow_connection() as conn:
+                for image_id in new_ids:
+                    row = conn.execute(
+                        'SELECT mime_type, file_size, original_file_name, created_at'
+                        ' FROM images WHERE image_id = ?',
+                        (bytes.fromhex(image_id),),
+                    ).fetchone()
+                    _seed_rows.append(
+                        (image_id, row[0], row[1], row[2], row[3],
+                         [image_repository.UNTAGGED_TAG])
+                    )
+
+        image_repository.ImageRepository().bulk_import(_seed_rows[:count])
+        return [row[0] for row in _seed_rows[:count]]
+
+    return seed
+
+
+@pytest.fixture
+def uploaded_5(seed_images):
+    return seed_images(5)
+
+
+@pytest.fixture
+def uploaded_10(seed_images):
+    return seed_images(10)
+
+
+@pytest.fixture
+def uploaded_15(seed_images):
+    return seed_images(15)
+
+
+@pytest.fixture
+def uploaded_25(seed_images):
+    return seed_images(25)
+
+
 @pytest.fixture
 def valid_test_image():
-    """Create a valid JPEG test image in memory"""
-    return io.BytesIO(MINIMAL_JPEG)
+    """A valid JPEG test image as raw bytes, reusable without seek(0)"""
+    return MINIMAL_JPEG
 
 
 @pytest.fixture
 def valid_test_png():
-    """Create a valid PNG test image in memory"""
-    return io.BytesIO(MINIMAL_PNG)
+    """A valid PNG test image as raw bytes, reusable without seek(0)"""
+    return MINIMAL_PNG
+
+
+_OVERSIZED_BOUNDARY = "oversized-test-boundary"
+
+
+def _oversized_multipart_body():
+    """Lazily generate a 51 MB multipart upload, one reused 1 MiB chunk at
+    a time, so the oversized payload never materializes in memory."""
+    yield (
+        f"--{_OVERSIZED_BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="large.jpg"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode()
+
+    chunk = b"\x00" * (1 << 20)
+    for _ in range(51):
+        yield chunk
+
+    yield f"\r\n--{_OVERSIZED_BOUNDARY}--\r\n".encode()
 
 
 @pytest.fixture
-def oversized_test_image():
-    """Create a test image larger than 50 MB"""
-    # Create a BytesIO-like object that streams more than 50 MB
-    class OversizedStream:
-        def __init__(self):
-            self.position = 0
-            self.size = 51 * 1024 * 1024  # 51 MB
-            self.header = b'\xFF\xD8\xFF\xE0'
-            self.chunk_size = 65536  # 64 KB chunks
-
-        def read(self, size=-1):
-            if size == -1:
-                size = self.chunk_size
-
-            if self.position >= self.size:
-                return b''
-
-            remaining = self.size - self.position
-            to_read = min(size, remaining)
-
-            # Return filler data that looks like JPEG
-            self.position += to_read
-            return b'\x00' * to_read
-
-        def seek(self, pos):
-            self.position = pos
-            return pos
-
-    return OversizedStream()
+def oversized_upload():
+    """Request kwargs (raw streamed content + headers) for a 51 MB upload"""
+    return {
+        "content": _oversized_multipart_body(),
+        "headers": {"Content-Type": f"multipart/form-data; boundary={_OVERSIZED_BOUNDARY}"},
+    }
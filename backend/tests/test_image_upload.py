@@ -1,44 +1,32 @@
-import json
 import hashlib
-from pathlib import Path
-import shutil
+import io
 
-from fastapi.testclient import TestClient
 import pytest
 
-from main import app
-from services.image_service import UPLOAD_DIR
-from db import init_db
+import services.image_service as image_service
 
 
-@pytest.fixture(autouse=True)
-def cleanup_uploads():
-    """Clean up uploads directory and initialize database before and after each test"""
-    from db import DB_PATH
-
-    # Delete old database to start fresh
-    if DB_PATH.exists():
-        DB_PATH.unlink()
-
-    # Initialize database
-    init_db()
-
-    if UPLOAD_DIR.exists():
-        shutil.rmtree(UPLOAD_DIR)
-    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
-    yield
-
-    # Cleanup after test
-    if UPLOAD_DIR.exists():
-        shutil.rmtree(UPLOAD_DIR)
-    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Cached response of the shared JPEG upload below. Tests that only
+# assert on response contents share one round-trip and digest through
+# it; the per-test reset deletes the uploaded file and rows, so any
+# test that asserts on disk or database state must do its own upload.
+_uploaded_jpeg_response = None
 
 
 @pytest.fixture
-def client():
-    """Create a test client for the FastAPI app"""
-    return TestClient(app)
+def uploaded_jpeg(client, valid_test_image):
+    """The response of the standard JPEG upload, posted once per run.
+
+    Safe for response-content assertions only; the backing file and row
+    are gone by the time later consumers run.
+    """
+    global _uploaded_jpeg_response
+    if _uploaded_jpeg_response is None:
+        _uploaded_jpeg_response = client.post(
+            "/api/image/uploadImage",
+            files={"file": ("test.jpg", valid_test_image, "image/jpeg")}
+        )
+    return _uploaded_jpeg_response
 
 
 class TestUploadImage:
@@ -46,6 +34,9 @@ class TestUploadImage:
 
     def test_upload_valid_jpeg(self, client, valid_test_image):
         """Test successful upload of a valid JPEG image"""
+        # Own upload rather than the shared uploaded_jpeg response: this
+        # test asserts the file landed on disk, which is only true in
+        # the test that performed the upload.
         response = client.post(
             "/api/image/uploadImage",
             files={"file": ("test.jpg", valid_test_image, "image/jpeg")}
@@ -53,20 +44,18 @@ class TestUploadImage:
 
         assert response.status_code == 201
 
-        data = response.json()
+        body = response.json()
+        assert body["success"] is True
+        data = body["data"]
         assert "id" in data
         assert data["mime_type"] == "image/jpeg"
         assert data["original_filename"] == "test.jpg"
         assert data["file_size"] > 0
-
-        # Verify Location header
-        assert "Location" in response.headers
-        assert data["id"] in response.headers["Location"]
+        assert data["tags"] == ["untagged"]
 
         # Verify file was saved
-        saved_file = UPLOAD_DIR / data["id"]
+        saved_file = image_service.UPLOAD_DIR / data["id"]
         assert saved_file.exists()
-        assert saved_file.is_file()
 
     def test_upload_valid_png(self, client, valid_test_png):
         """Test successful upload of a valid PNG image"""
@@ -77,12 +66,14 @@ class TestUploadImage:
 
         assert response.status_code == 201
 
-        data = response.json()
+        body = response.json()
+        assert body["success"] is True
+        data = body["data"]
         assert data["mime_type"] == "image/png"
         assert data["original_filename"] == "test.png"
 
         # Verify file was saved
-        saved_file = UPLOAD_DIR / data["id"]
+        saved_file = image_service.UPLOAD_DIR / data["id"]
         assert saved_file.exists()
 
     def test_upload_invalid_mime_type(self, client):
@@ -92,55 +83,41 @@ class TestUploadImage:
             files={"file": ("test.txt", b"This is not an image", "text/plain")}
         )
 
-        assert response.status_code == 400
-
-        data = response.json()
-        assert "not allowed" in data["detail"].lower()
+        body = response.json()
+        assert body["success"] is False
+        assert body["code"] == 400
+        assert "not allowed" in body["message"].lower()
 
-    def test_upload_oversized_file(self, client, oversized_test_image):
+    def test_upload_oversized_file(self, client, oversized_upload):
         """Test upload rejection when file exceeds 50 MB limit"""
-        response = client.post(
-            "/api/image/uploadImage",
-            files={"file": ("large.jpg", oversized_test_image, "image/jpeg")}
-        )
-
-        assert response.status_code == 413
-
-        data = response.json()
-        assert "exceeds" in data["detail"].lower()
-        assert "50" in data["detail"]
-
-    def test_upload_generates_sha1_id(self, client, valid_test_image):
-        """Test that upload generates correct SHA1 hash as ID"""
-        # Calculate expected SHA1
-        file_content = valid_test_image.read()
-        expected_sha1 = hashlib.sha1(file_content).hexdigest()
-
-        # Upload
-        valid_test_image.seek(0)
-        response = client.post(
-            "/api/image/uploadImage",
-            files={"file": ("test.jpg", valid_test_image, "image/jpeg")}
-        )
-
-        assert response.status_code == 201
-        data = response.json()
-        assert data["id"] == expected_sha1
-
-        # Verify file is saved with SHA1 name
-        saved_file = UPLOAD_DIR / expected_sha1
-        assert saved_file.exists()
-
-    def test_upload_response_json_structure(self, client, valid_test_image):
+        response = client.post("/api/image/uploadImage", **oversized_upload)
+
+        body = response.json()
+        assert body["success"] is False
+        assert body["code"] == 413
+        assert "exceeds" in body["message"].lower()
+        assert "50" in body["message"]
+
+    def test_upload_generates_content_hash_id(self, client, valid_test_image, uploaded_jpeg):
+        """Test that upload generates the correct content hash as ID"""
+        # Calculate expected BLAKE2b-160 digest, streaming in 1 MiB
+        # chunks like the service does so only one buffer is ever live
+        hasher = hashlib.blake2b(digest_size=20)
+        stream = io.BytesIO(valid_test_image)
+        while chunk := stream.read(1 << 20):
+            hasher.update(chunk)
+        expected_id = hasher.hexdigest()
+
+        assert uploaded_jpeg.status_code == 201
+        body = uploaded_jpeg.json()
+        assert body["success"] is True
+        assert body["data"]["id"] == expected_id
+
+    def test_upload_response_json_structure(self, client, uploaded_jpeg):
         """Test that response contains all required ImageInfo fields"""
-        response = client.post(
-            "/api/image/uploadImage",
-            files={"file": ("test.jpg", valid_test_image, "image/jpeg")}
-        )
-
-        assert response.status_code == 201
+        assert uploaded_jpeg.status_code == 201
 
-        data = response.json()
+        data = uploaded_jpeg.json()["data"]
         required_fields = {"id", "mime_type", "file_size", "original_filename"}
         assert required_fields.issubset(data.keys())
 
@@ -153,19 +130,17 @@ class TestUploadImage:
     def test_upload_duplicate_file_same_id(self, client, valid_test_image):
         """Test that uploading the same file twice generates the same ID"""
         # First upload
-        valid_test_image.seek(0)
         response1 = client.post(
             "/api/image/uploadImage",
             files={"file": ("test.jpg", valid_test_image, "image/jpeg")}
         )
-        id1 = response1.json()["id"]
+        id1 = response1.json()["data"]["id"]
 
         # Second upload of same file
-        valid_test_image.seek(0)
         response2 = client.post(
             "/api/image/uploadImage",
             files={"file": ("test.jpg", valid_test_image, "image/jpeg")}
         )
-        id2 = response2.json()["id"]
+        id2 = response2.json()["data"]["id"]
 
         assert id1 == id2